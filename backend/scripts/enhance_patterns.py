@@ -12,11 +12,55 @@ This script enhances the existing hash_patterns.json with:
 import json
 import re
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Precompiled charset patterns
+_HEX_RE = re.compile(r'^[a-fA-F0-9]+$')
+_B64_RE = re.compile(r'^[A-Za-z0-9+/]+=*$')
+
+# Canonical names for charset spellings found in scraped or legacy patterns
+_CHARSET_CANON = {
+    'hex': 'hex',
+    'hexadecimal': 'hex',
+    'hexadecimal_lower': 'hex',
+    'hexadecimal_upper': 'hex',
+    'base64': 'base64',
+    'base64_standard': 'base64',
+    'ascii': 'ascii',
+    'printable': 'ascii',
+}
+
+# Prefixes assigned to each hash family by enhance_pattern
+_FAMILY_PREFIXES = {
+    'bcrypt': ('$2a$', '$2b$', '$2y$'),
+    'argon2id': ('$argon2id$',),
+    'argon2i': ('$argon2i$',),
+    'argon2d': ('$argon2d$',),
+    'argon2': ('$argon2id$', '$argon2i$', '$argon2d$'),
+    'sha512c': ('$6$',),
+    'sha256c': ('$5$',),
+    'md5c': ('$1$',),
+    'sha1': ('{SHA}',),
+    'ssha': ('{SSHA}',),
+}
+
+# Argon2 prefixes are authoritative and replace whatever the pattern had
+_OVERRIDE_PREFIX_FAMILIES = frozenset({'argon2id', 'argon2i', 'argon2d', 'argon2'})
+
+_BCRYPT_NOTES = 'Blowfish-based password hashing with configurable cost'
+_ARGON2_NOTES = 'Memory-hard password hashing function'
+_NTLM_NOTES = 'Microsoft NTLM authentication protocol hash'
 
 def load_patterns(file_path: str) -> Dict:
     """Load existing hash patterns."""
     try:
+        if orjson is not None:
+            return orjson.loads(Path(file_path).read_bytes())
         with open(file_path, 'r', encoding='utf-8') as f:
             return json.load(f)
     except FileNotFoundError:
@@ -29,8 +73,11 @@ def load_patterns(file_path: str) -> Dict:
 def save_patterns(patterns: Dict, file_path: str):
     """Save patterns back to file."""
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(patterns, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            Path(file_path).write_bytes(orjson.dumps(patterns, option=orjson.OPT_INDENT_2))
+        else:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(patterns, f, indent=2, ensure_ascii=False)
         print(f"Saved {len(patterns)} patterns to {file_path}")
     except Exception as e:
         print(f"Error saving patterns: {e}")
@@ -80,86 +127,117 @@ def generate_regex_for_hash(hash_example: str, hash_type: str) -> str:
         return r'^[A-Za-z0-9+/]+=*$'
     
     # Generic hex patterns based on length
-    elif hash_example and re.match(r'^[a-fA-F0-9]+$', hash_example):
+    elif hash_example and _HEX_RE.match(hash_example):
         length = len(hash_example)
         return f'^[a-fA-F0-9]{{{length}}}$'
     
     # Generic base64 patterns
-    elif hash_example and re.match(r'^[A-Za-z0-9+/]+=*$', hash_example):
+    elif hash_example and _B64_RE.match(hash_example):
         return r'^[A-Za-z0-9+/]+=*$'
     
     # Default: exact match
     else:
         return f'^{re.escape(hash_example)}$'
 
-def enhance_pattern(pattern: Dict, key: str) -> Dict:
-    """Enhance a single pattern with better detection capabilities."""
-    enhanced = pattern.copy()
-    
-    # Add regex if missing
-    if not enhanced.get('regex') and enhanced.get('example'):
-        enhanced['regex'] = generate_regex_for_hash(enhanced['example'], enhanced.get('name', ''))
-    
-    # Enhance prefixes for known hash types
-    name = enhanced.get('name', '').lower()
-    
+def _classify_family(name: str) -> Optional[str]:
+    """Map a lowercased hash name to its family tag, or None if unknown."""
     if 'bcrypt' in name:
-        if not enhanced.get('prefixes'):
-            enhanced['prefixes'] = ['$2a$', '$2b$', '$2y$']
-    
-    elif 'argon2' in name:
+        return 'bcrypt'
+    if 'argon2' in name:
         if 'argon2id' in name:
-            enhanced['prefixes'] = ['$argon2id$']
-        elif 'argon2i' in name:
-            enhanced['prefixes'] = ['$argon2i$']
-        elif 'argon2d' in name:
-            enhanced['prefixes'] = ['$argon2d$']
-        else:
-            enhanced['prefixes'] = ['$argon2id$', '$argon2i$', '$argon2d$']
-    
-    elif 'sha-512' in name or 'sha512' in name:
-        if not enhanced.get('prefixes'):
-            enhanced['prefixes'] = ['$6$']
-    
-    elif 'sha-256' in name or 'sha256' in name:
-        if not enhanced.get('prefixes'):
-            enhanced['prefixes'] = ['$5$']
-    
-    elif 'md5' in name and 'crypt' in name:
-        if not enhanced.get('prefixes'):
-            enhanced['prefixes'] = ['$1$']
-    
-    elif name == 'sha-1' or name == 'sha1':
-        if not enhanced.get('prefixes'):
-            enhanced['prefixes'] = ['{SHA}']
+            return 'argon2id'
+        if 'argon2i' in name:
+            return 'argon2i'
+        if 'argon2d' in name:
+            return 'argon2d'
+        return 'argon2'
+    if 'sha-512' in name or 'sha512' in name:
+        return 'sha512c'
+    if 'sha-256' in name or 'sha256' in name:
+        return 'sha256c'
+    if 'md5' in name and 'crypt' in name:
+        return 'md5c'
+    if name == 'sha-1' or name == 'sha1':
+        return 'sha1'
+    if 'ssha' in name or 'salted sha' in name:
+        return 'ssha'
+    return None
+
+def _compute_enhancements(name: str, example: str, charset: str, has_regex: bool,
+                          has_prefixes: bool, has_notes: bool
+                          ) -> Tuple[Optional[str], Optional[Tuple[str, ...]], str, Optional[str]]:
+    """Work out a pattern's enhancements from plain field values.
+    
+    Returns (regex, prefixes, charset, notes). regex, prefixes and notes are
+    None when the field should be left as it is.
+    """
+    # Add regex if missing
+    regex = None
+    if not has_regex and example:
+        regex = generate_regex_for_hash(example, name)
     
-    elif 'ssha' in name or 'salted sha' in name:
-        if not enhanced.get('prefixes'):
-            enhanced['prefixes'] = ['{SSHA}']
+    # Enhance prefixes for known hash types
+    lowered = name.lower()
+    family = _classify_family(lowered)
+    prefixes = None
+    if family and (family in _OVERRIDE_PREFIX_FAMILIES or not has_prefixes):
+        prefixes = _FAMILY_PREFIXES[family]
     
     # Normalize charset
-    if enhanced.get('charset'):
-        charset = enhanced['charset'].lower()
-        if charset in ['hexadecimal', 'hexadecimal_lower', 'hexadecimal_upper']:
-            enhanced['charset'] = 'hex'
-        elif charset in ['base64', 'base64_standard']:
-            enhanced['charset'] = 'base64'
-        elif charset in ['ascii', 'printable']:
-            enhanced['charset'] = 'ascii'
+    if charset:
+        charset = _CHARSET_CANON.get(charset.lower(), charset)
+    
+    # Add notes for special cases
+    notes = None
+    if not has_notes:
+        if family == 'bcrypt':
+            notes = _BCRYPT_NOTES
+        elif family in _OVERRIDE_PREFIX_FAMILIES:
+            notes = _ARGON2_NOTES
+        elif 'ntlm' in lowered:
+            notes = _NTLM_NOTES
+    
+    return regex, prefixes, charset, notes
+
+def enhance_pattern(pattern: Dict, key: str) -> Tuple[Dict, bool]:
+    """Enhance a single pattern in place with better detection capabilities.
+    
+    Returns the pattern together with a flag telling whether any field changed.
+    """
+    changed = False
+    regex, prefixes, charset, notes = _compute_enhancements(
+        pattern.get('name') or '',
+        pattern.get('example') or '',
+        pattern.get('charset') or '',
+        bool(pattern.get('regex')),
+        bool(pattern.get('prefixes')),
+        bool(pattern.get('notes')),
+    )
+    
+    if regex:
+        pattern['regex'] = regex
+        changed = True
+    
+    if prefixes is not None:
+        prefixes = list(prefixes)
+        if pattern.get('prefixes') != prefixes:
+            pattern['prefixes'] = prefixes
+            changed = True
+    
+    if charset and pattern['charset'] != charset:
+        pattern['charset'] = charset
+        changed = True
     
     # Add source if missing
-    if not enhanced.get('source'):
-        enhanced['source'] = 'Pattern Enhancement Script'
+    if not pattern.get('source'):
+        pattern['source'] = 'Pattern Enhancement Script'
+        changed = True
     
-    # Add notes for special cases
-    if 'bcrypt' in name and not enhanced.get('notes'):
-        enhanced['notes'] = 'Blowfish-based password hashing with configurable cost'
-    elif 'argon2' in name and not enhanced.get('notes'):
-        enhanced['notes'] = 'Memory-hard password hashing function'
-    elif 'ntlm' in name and not enhanced.get('notes'):
-        enhanced['notes'] = 'Microsoft NTLM authentication protocol hash'
+    if notes:
+        pattern['notes'] = notes
+        changed = True
     
-    return enhanced
+    return pattern, changed
 
 def add_missing_patterns(patterns: Dict) -> Dict:
     """Add commonly missing hash patterns."""
@@ -220,10 +298,9 @@ def main():
     enhanced_count = 0
     
     for key, pattern in patterns.items():
-        original_pattern = pattern.copy()
-        enhanced_pattern = enhance_pattern(pattern, key)
+        enhanced_pattern, changed = enhance_pattern(pattern, key)
         
-        if enhanced_pattern != original_pattern:
+        if changed:
             patterns[key] = enhanced_pattern
             enhanced_count += 1
     
@@ -14,24 +14,144 @@ Sources:
 - John the Ripper formats
 - Online hash identifier tools
 - GitHub repositories with hash examples
+
+Requires Python 3.10 or newer.
 """
 
 import json
 import re
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 from typing import Dict, List, Set, Optional, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Precompiled charset patterns
+_HEX_RE = re.compile(r'^[a-fA-F0-9]+$')
+_B64_RE = re.compile(r'^[A-Za-z0-9+/]+=*$')
+
+# Alphabets for charset detection, used as bytes.translate deletion tables
+_HEX_CHARS = b'0123456789abcdefABCDEF'
+_B64_CHARS = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+# Canonical names for charset spellings found in scraped or legacy patterns
+_CHARSET_CANON = {
+    'hex': 'hex',
+    'hexadecimal': 'hex',
+    'hexadecimal_lower': 'hex',
+    'hexadecimal_upper': 'hex',
+    'base64': 'base64',
+    'base64_standard': 'base64',
+    'ascii': 'ascii',
+    'printable': 'ascii',
+}
+
+# Common hash patterns used to spot candidates in scraped text, fused into a
+# single alternation so each candidate costs one match attempt. Branches are
+# keyed on the first character ('$', '{' or the base64 alphabet) so at most
+# one of them ever scans past it; hex hashes fall under the base64 branch.
+_POTENTIAL_HASH_RE = re.compile(
+    r'^(?:'
+    r'\$(?:2[aby]\$|argon2|[156]\$)'  # bcrypt, Argon2, SHA-512/SHA-256/MD5 crypt
+    r'|\{S?SHA\}'  # SHA with prefix, salted SHA
+    r'|[A-Za-z0-9+/]+=*$'  # Base64 and hex hashes
+    r')'
+)
+
+# Line-oriented form of _POTENTIAL_HASH_RE for scanning whole text blocks;
+# captures each candidate line with surrounding whitespace stripped.
+_LINE_HASH_RE = re.compile(
+    r'^[^\S\n]*('
+    r'(?:\$2[aby]\$|\$argon2|\$[156]\$|\{S?SHA\})[^\n]*?'
+    r'|[A-Za-z0-9+/]+=*'
+    r')[^\S\n]*$',
+    re.MULTILINE,
+)
+
+# Known hash prefixes -> (name, prefixes, regex)
+_PREFIX_TABLE = {
+    '$2': ("bcrypt", ('$2a$', '$2b$', '$2y$'),
+           r'^\$2[aby]\$[0-9]{2}\$[./A-Za-z0-9]{53}$'),
+    '$argon2': ("Argon2", ('$argon2id$', '$argon2i$', '$argon2d$'),
+                r'^\$argon2[id]?\$v=\d+\$m=\d+,t=\d+,p=\d+\$[A-Za-z0-9+/]+\$[A-Za-z0-9+/]+$'),
+    '$6$': ("SHA-512 crypt", ('$6$',), r'^\$6\$[^$]+\$[A-Za-z0-9./]+$'),
+    '$5$': ("SHA-256 crypt", ('$5$',), r'^\$5\$[^$]+\$[A-Za-z0-9./]+$'),
+    '$1$': ("MD5 crypt", ('$1$',), r'^\$1\$[^$]+\$[A-Za-z0-9./]+$'),
+    '{SHA}': ("SHA-1 with prefix", ('{SHA}',), r'^\{SHA\}[A-Za-z0-9+/]+=*$'),
+    '{SSHA}': ("Salted SHA-1", ('{SSHA}',), r'^\{SSHA\}[A-Za-z0-9+/]+=*$'),
+}
+_PREFIX_LENGTHS = sorted({len(prefix) for prefix in _PREFIX_TABLE}, reverse=True)
+
+def _lookup_prefix(hash_example: str) -> Optional[Tuple[str, Tuple[str, ...], str]]:
+    """Return the prefix table entry for a hash example, if any."""
+    if hash_example[:1] not in ('$', '{'):
+        return None
+    for length in _PREFIX_LENGTHS:
+        entry = _PREFIX_TABLE.get(hash_example[:length])
+        if entry:
+            return entry
+    return None
+
+def _iter_element_texts(content: bytes, tags: List[str]):
+    """Yield the text of every element in the page with one of the given tags."""
+    if HTMLParser is not None:
+        for node in HTMLParser(content).css(', '.join(tags)):
+            yield node.text()
+    else:
+        # Only needed when selectolax is not installed
+        from bs4 import BeautifulSoup
+        for element in BeautifulSoup(content, 'html.parser').find_all(tags):
+            yield element.get_text()
+
+def _detect_charset(text: str) -> Optional[str]:
+    """Classify text as hex, base64 or printable ASCII, tried in that order."""
+    if not text or not text.isascii():
+        return None
+    data = text.encode('ascii')
+    if not data.translate(None, _HEX_CHARS):
+        return "hex"
+    body = data.rstrip(b'=')
+    if body and not body.translate(None, _B64_CHARS):
+        return "base64"
+    if text.isprintable():
+        return "ascii"
+    return None
+
+def _pattern_signature(pattern: Dict) -> Tuple:
+    """Build a hashable signature identifying duplicate patterns."""
+    return (
+        pattern.get('name', ''),
+        pattern.get('length'),
+        pattern.get('charset', ''),
+        tuple(pattern.get('prefixes') or ()),
+        tuple(pattern.get('suffixes') or ()),
+    )
+
+@dataclass(slots=True, frozen=True)
 class HashPattern:
     name: str
     length: Optional[int] = None
@@ -46,16 +166,27 @@ class HashPattern:
 class HashPatternEnricher:
     def __init__(self, patterns_file: str = "data/hash_patterns.json"):
         self.patterns_file = Path(patterns_file)
+        self.checkpoint_file = self.patterns_file.with_suffix('.jsonl')
         self.existing_patterns = self.load_existing_patterns()
+        self.restore_checkpoint()
         self.new_patterns = []
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        
+        self.client = self.create_client()
+    
+    def create_client(self):
+        """Create a shared HTTP/2 httpx client, or return None to fetch with requests."""
+        if httpx is None:
+            return None
+        try:
+            return httpx.Client(http2=True, headers=_HEADERS, timeout=30.0, follow_redirects=True)
+        except ImportError:
+            # http2=True needs the optional h2 package
+            return None
+    
     def load_existing_patterns(self) -> Dict:
         """Load existing hash patterns from JSON file."""
         try:
+            if orjson is not None:
+                return orjson.loads(self.patterns_file.read_bytes())
             with open(self.patterns_file, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except FileNotFoundError:
@@ -65,14 +196,81 @@ class HashPatternEnricher:
             logger.error(f"Error parsing JSON file: {e}")
             return {}
     
-    def save_patterns(self):
+    def restore_checkpoint(self):
+        """Merge patterns checkpointed by an interrupted run into the loaded ones."""
+        # The checkpoint only ever adds keys that are missing, so it is merged
+        # even if something else has rewritten the patterns file since
+        if not self.checkpoint_file.exists():
+            return
+        
+        restored = 0
+        with open(self.checkpoint_file, 'rb') as f:
+            for line in f:
+                try:
+                    record = orjson.loads(line) if orjson is not None else json.loads(line)
+                except ValueError:
+                    # A crash mid-write can leave a truncated last line
+                    record = None
+                if not isinstance(record, dict):
+                    logger.warning(f"Skipping malformed checkpoint line in {self.checkpoint_file}")
+                    continue
+                for key, pattern in record.items():
+                    if isinstance(pattern, dict) and key not in self.existing_patterns:
+                        self.existing_patterns[key] = pattern
+                        restored += 1
+        
+        logger.info(f"Restored {restored} patterns from checkpoint {self.checkpoint_file}")
+    
+    def open_checkpoint(self):
+        """Open the checkpoint file for appending, or return None if it can't be written."""
+        try:
+            return open(self.checkpoint_file, 'ab')
+        except OSError as e:
+            logger.warning(f"Cannot open checkpoint {self.checkpoint_file}: {e}. Continuing without checkpointing.")
+            return None
+    
+    def checkpoint_patterns(self, checkpoint, patterns: Dict[str, Dict]):
+        """Append new patterns, one per line, to the open checkpoint file."""
+        for key, pattern in patterns.items():
+            record = {key: pattern}
+            if orjson is not None:
+                checkpoint.write(orjson.dumps(record) + b'\n')
+            else:
+                checkpoint.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+        checkpoint.flush()
+    
+    def save_patterns(self) -> bool:
         """Save enriched patterns back to JSON file."""
         try:
-            with open(self.patterns_file, 'w', encoding='utf-8') as f:
-                json.dump(self.existing_patterns, f, indent=2, ensure_ascii=False)
+            if orjson is not None:
+                self.patterns_file.write_bytes(orjson.dumps(self.existing_patterns, option=orjson.OPT_INDENT_2))
+            else:
+                with open(self.patterns_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.existing_patterns, f, indent=2, ensure_ascii=False)
             logger.info(f"Saved {len(self.existing_patterns)} patterns to {self.patterns_file}")
+            return True
         except Exception as e:
             logger.error(f"Error saving patterns: {e}")
+            return False
+    
+    def fetch_page(self, url: str) -> bytes:
+        """Fetch a page and return its raw content.
+        
+        httpx.Client is thread-safe and shared; requests.Session is not
+        documented as such, so the requests fallback opens one per fetch.
+        """
+        if self.client is not None:
+            response = self.client.get(url, timeout=30)
+            response.raise_for_status()
+            return response.content
+        
+        # Fallback when httpx or its h2 extra is unavailable
+        import requests
+        with requests.Session() as session:
+            session.headers.update(_HEADERS)
+            response = session.get(url, timeout=30)
+            response.raise_for_status()
+            return response.content
     
     def scrape_hashcat_examples(self):
         """Scrape Hashcat example hashes from their wiki."""
@@ -80,22 +278,18 @@ class HashPatternEnricher:
         
         try:
             url = "https://hashcat.net/wiki/doku.php?id=example_hashes"
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            page = self.fetch_page(url)
             
             # Look for hash examples in the content
             hash_examples = []
+            seen = set()
             
             # Find code blocks and pre tags that might contain hash examples
-            for code_block in soup.find_all(['code', 'pre']):
-                text = code_block.get_text().strip()
-                lines = text.split('\n')
-                
-                for line in lines:
-                    line = line.strip()
-                    if self.is_potential_hash(line):
+            for text in _iter_element_texts(page, ['code', 'pre']):
+                for match in _LINE_HASH_RE.finditer(text):
+                    line = match.group(1)
+                    if len(line) >= 8 and line not in seen:
+                        seen.add(line)
                         hash_examples.append(line)
             
             logger.info(f"Found {len(hash_examples)} potential hash examples from Hashcat")
@@ -111,17 +305,14 @@ class HashPatternEnricher:
         
         try:
             url = "https://openwall.com/john/doc/EXAMPLES.shtml"
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            page = self.fetch_page(url)
             
             # Extract hash format information
             formats = []
             
             # Look for hash format descriptions
-            for element in soup.find_all(['p', 'li', 'pre']):
-                text = element.get_text().strip()
+            for text in _iter_element_texts(page, ['p', 'li', 'pre']):
+                text = text.strip()
                 if any(keyword in text.lower() for keyword in ['hash', 'password', 'crypt', 'md5', 'sha']):
                     formats.append(text)
             
@@ -144,22 +335,21 @@ class HashPatternEnricher:
         ]
         
         hash_examples = []
+        seen = set()
+        
+        # Each tool lives on its own host, so fetch them all concurrently
+        with ThreadPoolExecutor(max_workers=len(tools)) as executor:
+            pages = {tool_url: executor.submit(self.fetch_page, tool_url) for tool_url in tools}
         
-        for tool_url in tools:
+        for tool_url, page in pages.items():
             try:
-                response = self.session.get(tool_url, timeout=30)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
                 # Look for hash examples in the page
-                for element in soup.find_all(['code', 'pre', 'span', 'div']):
-                    text = element.get_text().strip()
-                    if self.is_potential_hash(text):
+                for text in _iter_element_texts(page.result(), ['code', 'pre', 'span', 'div']):
+                    text = text.strip()
+                    if text not in seen and self.is_potential_hash(text):
+                        seen.add(text)
                         hash_examples.append(text)
                 
-                time.sleep(1)  # Be respectful to the server
-                
             except Exception as e:
                 logger.error(f"Error scraping {tool_url}: {e}")
                 continue
@@ -172,134 +362,68 @@ class HashPatternEnricher:
         if not text or len(text) < 8:
             return False
         
-        # Check for common hash patterns
-        hash_patterns = [
-            r'^[a-fA-F0-9]{32,128}$',  # Hex hashes
-            r'^\$2[aby]\$',  # bcrypt
-            r'^\$argon2',  # Argon2
-            r'^\$6\$',  # SHA-512 crypt
-            r'^\$5\$',  # SHA-256 crypt
-            r'^\$1\$',  # MD5 crypt
-            r'^[A-Za-z0-9+/]+=*$',  # Base64
-            r'^\{SHA\}',  # SHA with prefix
-            r'^\{SSHA\}',  # Salted SHA
-        ]
-        
-        for pattern in hash_patterns:
-            if re.match(pattern, text):
-                return True
-        
-        return False
+        return bool(_POTENTIAL_HASH_RE.match(text))
     
     def analyze_hash_example(self, hash_example: str) -> Optional[HashPattern]:
         """Analyze a hash example and extract pattern information."""
         if not hash_example or len(hash_example) < 8:
             return None
         
-        pattern = HashPattern(name="Unknown")
-        
-        # Determine charset
-        if re.match(r'^[a-fA-F0-9]+$', hash_example):
-            pattern.charset = "hex"
-        elif re.match(r'^[A-Za-z0-9+/]+=*$', hash_example):
-            pattern.charset = "base64"
-        elif re.match(r'^[\x20-\x7E]+$', hash_example):
-            pattern.charset = "ascii"
-        
         # Determine length
-        pattern.length = len(hash_example)
-        
-        # Check for prefixes
-        prefixes = []
-        if hash_example.startswith('$2'):
-            prefixes.append('$2a$')
-            prefixes.append('$2b$')
-            prefixes.append('$2y$')
-            pattern.name = "bcrypt"
-        elif hash_example.startswith('$argon2'):
-            prefixes.append('$argon2id$')
-            prefixes.append('$argon2i$')
-            prefixes.append('$argon2d$')
-            pattern.name = "Argon2"
-        elif hash_example.startswith('$6$'):
-            prefixes.append('$6$')
-            pattern.name = "SHA-512 crypt"
-        elif hash_example.startswith('$5$'):
-            prefixes.append('$5$')
-            pattern.name = "SHA-256 crypt"
-        elif hash_example.startswith('$1$'):
-            prefixes.append('$1$')
-            pattern.name = "MD5 crypt"
-        elif hash_example.startswith('{SHA}'):
-            prefixes.append('{SHA}')
-            pattern.name = "SHA-1 with prefix"
-        elif hash_example.startswith('{SSHA}'):
-            prefixes.append('{SSHA}')
-            pattern.name = "Salted SHA-1"
-        
-        if prefixes:
-            pattern.prefixes = prefixes
-        
-        # Generate regex pattern
-        pattern.regex = self.generate_regex_pattern(hash_example)
-        
-        # Set example
-        pattern.example = hash_example
-        
-        # Determine name if not set
-        if pattern.name == "Unknown":
-            if pattern.charset == "hex":
-                if pattern.length == 32:
-                    pattern.name = "MD5"
-                elif pattern.length == 40:
-                    pattern.name = "SHA-1"
-                elif pattern.length == 64:
-                    pattern.name = "SHA-256"
-                elif pattern.length == 128:
-                    pattern.name = "SHA-512"
+        length = len(hash_example)
+        
+        # Check for prefixes. '$' and '{' are outside the hex and base64
+        # alphabets, so prefixed examples can only be printable ASCII.
+        prefixes = None
+        prefix_entry = _lookup_prefix(hash_example)
+        if prefix_entry:
+            name, prefix_tuple, regex = prefix_entry
+            prefixes = list(prefix_tuple)
+            charset = "ascii" if hash_example.isascii() and hash_example.isprintable() else None
+        else:
+            # Determine charset, then derive regex and name from charset/length
+            charset = _detect_charset(hash_example)
+            if charset == "hex":
+                regex = f'^[a-fA-F0-9]{{{length}}}$'
+                if length == 32:
+                    name = "MD5"
+                elif length == 40:
+                    name = "SHA-1"
+                elif length == 64:
+                    name = "SHA-256"
+                elif length == 128:
+                    name = "SHA-512"
                 else:
-                    pattern.name = f"Hex Hash ({pattern.length} chars)"
-            elif pattern.charset == "base64":
-                pattern.name = "Base64"
+                    name = f"Hex Hash ({length} chars)"
+            elif charset == "base64":
+                regex = r'^[A-Za-z0-9+/]+=*$'
+                name = "Base64"
             else:
-                pattern.name = f"Hash ({pattern.length} chars)"
-        
-        return pattern
+                regex = f'^{re.escape(hash_example)}$'
+                name = f"Hash ({length} chars)"
+        
+        return HashPattern(
+            name=name,
+            length=length,
+            charset=charset,
+            prefixes=prefixes,
+            regex=regex,
+            example=hash_example,
+        )
     
     def generate_regex_pattern(self, hash_example: str) -> str:
         """Generate a regex pattern for a hash example."""
         if not hash_example:
             return ""
         
-        # Escape special regex characters
-        escaped = re.escape(hash_example)
-        
-        # Replace specific parts with regex patterns
-        if hash_example.startswith('$2'):
-            # bcrypt pattern
-            return r'^\$2[aby]\$[0-9]{2}\$[./A-Za-z0-9]{53}$'
-        elif hash_example.startswith('$argon2'):
-            # Argon2 pattern
-            return r'^\$argon2[id]?\$v=\d+\$m=\d+,t=\d+,p=\d+\$[A-Za-z0-9+/]+\$[A-Za-z0-9+/]+$'
-        elif hash_example.startswith('$6$'):
-            # SHA-512 crypt pattern
-            return r'^\$6\$[^$]+\$[A-Za-z0-9./]+$'
-        elif hash_example.startswith('$5$'):
-            # SHA-256 crypt pattern
-            return r'^\$5\$[^$]+\$[A-Za-z0-9./]+$'
-        elif hash_example.startswith('$1$'):
-            # MD5 crypt pattern
-            return r'^\$1\$[^$]+\$[A-Za-z0-9./]+$'
-        elif hash_example.startswith('{SHA}'):
-            # SHA with prefix pattern
-            return r'^\{SHA\}[A-Za-z0-9+/]+=*$'
-        elif hash_example.startswith('{SSHA}'):
-            # Salted SHA pattern
-            return r'^\{SSHA\}[A-Za-z0-9+/]+=*$'
-        elif re.match(r'^[a-fA-F0-9]+$', hash_example):
+        # Known prefixes map straight to their regex
+        prefix_entry = _lookup_prefix(hash_example)
+        if prefix_entry:
+            return prefix_entry[2]
+        elif _HEX_RE.match(hash_example):
             # Hex pattern
             return f'^[a-fA-F0-9]{{{len(hash_example)}}}$'
-        elif re.match(r'^[A-Za-z0-9+/]+=*$', hash_example):
+        elif _B64_RE.match(hash_example):
             # Base64 pattern
             return r'^[A-Za-z0-9+/]+=*$'
         else:
@@ -310,37 +434,31 @@ class HashPatternEnricher:
         """Remove duplicate patterns and merge similar ones."""
         logger.info("Deduplicating patterns...")
         
-        seen_patterns = set()
+        # Signature -> key of the first pattern seen with it
+        seen_patterns: Dict[Tuple, str] = {}
         unique_patterns = {}
         
         for key, pattern in self.existing_patterns.items():
-            # Create a signature for the pattern
-            signature = (
-                pattern.get('name', ''),
-                pattern.get('length'),
-                pattern.get('charset', ''),
-                tuple(pattern.get('prefixes', []) or []),
-                tuple(pattern.get('suffixes', []) or [])
-            )
+            signature = _pattern_signature(pattern)
             
-            if signature not in seen_patterns:
-                seen_patterns.add(signature)
+            first_key = seen_patterns.get(signature)
+            if first_key is None:
+                seen_patterns[signature] = key
                 unique_patterns[key] = pattern
             else:
-                # Merge with existing pattern
-                existing = unique_patterns.get(key, {})
-                if pattern.get('example') and pattern['example'] not in (existing.get('example', '')):
+                # Merge into the first pattern with this signature
+                existing = unique_patterns[first_key]
+                example = pattern.get('example')
+                if example and example != existing.get('example'):
                     # Add example if it's different
-                    if 'examples' not in existing:
-                        existing['examples'] = [existing.get('example', '')]
-                    existing['examples'].append(pattern['example'])
+                    examples = existing.setdefault('examples', [existing.get('example', '')])
+                    if example not in examples:
+                        examples.append(example)
                 
                 # Merge other fields
-                for field in ['source', 'notes']:
+                for field in ('source', 'notes'):
                     if pattern.get(field) and not existing.get(field):
                         existing[field] = pattern[field]
-                
-                unique_patterns[key] = existing
         
         self.existing_patterns = unique_patterns
         logger.info(f"After deduplication: {len(unique_patterns)} unique patterns")
@@ -356,43 +474,22 @@ class HashPatternEnricher:
             
             # Normalize charset
             if pattern.get('charset'):
-                charset = pattern['charset'].lower()
-                if charset in ['hexadecimal', 'hexadecimal_lower', 'hexadecimal_upper']:
-                    pattern['charset'] = 'hex'
-                elif charset in ['base64', 'base64_standard']:
-                    pattern['charset'] = 'base64'
-                elif charset in ['ascii', 'printable']:
-                    pattern['charset'] = 'ascii'
+                pattern['charset'] = _CHARSET_CANON.get(pattern['charset'].lower(), pattern['charset'])
             
             # Add source if missing
             if not pattern.get('source'):
                 pattern['source'] = 'Pattern Enrichment System'
     
-    def run_enrichment(self):
-        """Run the complete pattern enrichment process."""
-        logger.info("Starting hash pattern enrichment process...")
-        
-        # Step 1: Scrape data from various sources
-        hashcat_examples = self.scrape_hashcat_examples()
-        john_formats = self.scrape_john_the_ripper_formats()
-        online_examples = self.scrape_online_hash_tools()
-        
-        # Step 2: Analyze scraped examples
-        all_examples = hashcat_examples + online_examples
-        new_patterns = []
-        
-        for example in all_examples:
+    def analyze_examples(self, examples: List[str]) -> Dict[str, Dict]:
+        """Analyze scraped examples into new pattern entries keyed like the patterns file."""
+        patterns = {}
+        for example in dict.fromkeys(examples):
             pattern = self.analyze_hash_example(example)
-            if pattern and pattern.name != "Unknown":
-                new_patterns.append(pattern)
-        
-        logger.info(f"Analyzed {len(new_patterns)} new patterns from scraped data")
-        
-        # Step 3: Add new patterns to existing ones
-        for pattern in new_patterns:
+            if not pattern or pattern.name == "Unknown":
+                continue
             key = pattern.name.replace(' ', '_').replace('(', '').replace(')', '')
-            if key not in self.existing_patterns:
-                self.existing_patterns[key] = {
+            if key not in self.existing_patterns and key not in patterns:
+                patterns[key] = {
                     'name': pattern.name,
                     'length': pattern.length,
                     'charset': pattern.charset,
@@ -404,12 +501,56 @@ class HashPatternEnricher:
                     'notes': pattern.notes
                 }
         
-        # Step 4: Deduplicate and clean
+        logger.info(f"Analyzed {len(patterns)} new patterns from {len(examples)} examples")
+        return patterns
+    
+    def run_enrichment(self):
+        """Run the complete pattern enrichment process."""
+        logger.info("Starting hash pattern enrichment process...")
+        
+        # Step 1: Scrape data from various sources concurrently. Each source's
+        # examples are analyzed and checkpointed as soon as it finishes, so a
+        # failure or interrupt later in the run keeps what was already found
+        source_patterns = {}
+        checkpoint = self.open_checkpoint()
+        try:
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = {
+                    executor.submit(self.scrape_hashcat_examples): 'hashcat',
+                    executor.submit(self.scrape_john_the_ripper_formats): 'john',
+                    executor.submit(self.scrape_online_hash_tools): 'online',
+                }
+                for future in as_completed(futures):
+                    source = futures[future]
+                    if source == 'john':
+                        # Format descriptions carry no hash examples to analyze
+                        future.result()
+                        continue
+                    source_patterns[source] = self.analyze_examples(future.result())
+                    if checkpoint is not None:
+                        self.checkpoint_patterns(checkpoint, source_patterns[source])
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+        
+        # Step 2: Add new patterns to existing ones in a fixed source order;
+        # the first source to produce a key wins
+        added = 0
+        for source in ('hashcat', 'online'):
+            for key, pattern in source_patterns[source].items():
+                if key not in self.existing_patterns:
+                    self.existing_patterns[key] = pattern
+                    added += 1
+        
+        logger.info(f"Added {added} new patterns from scraped data")
+        
+        # Step 3: Deduplicate and clean
         self.deduplicate_patterns()
         self.enrich_existing_patterns()
         
-        # Step 5: Save enriched patterns
-        self.save_patterns()
+        # Step 4: Save enriched patterns; the checkpoint is only needed until then
+        if self.save_patterns():
+            self.checkpoint_file.unlink(missing_ok=True)
         
         logger.info("Pattern enrichment process completed!")
         return len(self.existing_patterns)
@@ -3,18 +3,102 @@
 Hash Pattern Validation and Testing Script
 
 This script validates the enhanced hash patterns and tests detection accuracy.
+
+Requires Python 3.10 or newer.
 """
 
+import argparse
+import io
 import json
 import re
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import compress
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional, TextIO
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Charset alphabets, used as bytes.translate deletion tables. For hash-length
+# input (32-128 chars) translate beats both all(c in frozenset) and
+# frozenset.issuperset, which only win on strings of a few characters.
+_HEX_CHARS = b'0123456789abcdefABCDEF'
+_B64_CHARS = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+def _is_hex(text: str) -> bool:
+    """Check that text is non-empty and only hex digits."""
+    return bool(text) and text.isascii() and not text.encode('ascii').translate(None, _HEX_CHARS)
+
+def _is_base64(text: str) -> bool:
+    """Check that text is base64 alphabet characters followed by optional '=' padding."""
+    if not text.isascii():
+        return False
+    body = text.encode('ascii').rstrip(b'=')
+    return bool(body) and not body.translate(None, _B64_CHARS)
+
+def _is_ascii(text: str) -> bool:
+    """Check that text is non-empty printable ASCII (0x20-0x7E)."""
+    return bool(text) and text.isascii() and text.isprintable()
+
+_CHARSET_CHECKS = {
+    'hex': _is_hex,
+    'base64': _is_base64,
+    'ascii': _is_ascii,
+}
+
+def _matching_charsets(text: str) -> Tuple[str, ...]:
+    """Return every charset text belongs to, from a single classification pass.
+    
+    Hex digits are a subset of the base64 alphabet, which is printable ASCII,
+    so each check only runs when the wider one has passed.
+    """
+    if not text or not text.isascii() or not text.isprintable():
+        return ()
+    data = text.encode('ascii')
+    body = data.rstrip(b'=')
+    if not body or body.translate(None, _B64_CHARS):
+        return ('ascii',)
+    if len(body) != len(data) or body.translate(None, _HEX_CHARS):
+        return ('ascii', 'base64')
+    return ('ascii', 'base64', 'hex')
+
+# Compiled pattern regexes keyed by regex string, as (compiled, error)
+_REGEX_CACHE: Dict[str, Tuple[Optional[re.Pattern], Optional[str]]] = {}
+
+def compile_pattern_regex(regex: str) -> Tuple[Optional[re.Pattern], Optional[str]]:
+    """Compile a pattern regex once per distinct string.
+    
+    Returns (compiled, None), or (None, error message) for an invalid regex.
+    Keying on the string means an edited regex is always compiled afresh.
+    """
+    cached = _REGEX_CACHE.get(regex)
+    if cached is None:
+        try:
+            cached = (re.compile(regex), None)
+        except re.error as e:
+            cached = (None, str(e))
+        _REGEX_CACHE[regex] = cached
+    return cached
 
 def load_patterns(file_path: str) -> Dict:
-    """Load hash patterns from JSON file."""
+    """Load hash patterns from JSON file.
+    
+    Pattern regexes are compiled into the regex cache as they are loaded.
+    """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        if orjson is not None:
+            patterns = orjson.loads(Path(file_path).read_bytes())
+        else:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                patterns = json.load(f)
+        for pattern in patterns.values():
+            if pattern.get('regex'):
+                compile_pattern_regex(pattern['regex'])
+        return patterns
     except FileNotFoundError:
         print(f"File {file_path} not found!")
         return {}
@@ -55,10 +139,9 @@ def validate_pattern_structure(pattern: Dict, key: str) -> List[str]:
     
     # Validate regex if present
     if 'regex' in pattern and pattern['regex']:
-        try:
-            re.compile(pattern['regex'])
-        except re.error as e:
-            errors.append(f"Invalid regex: {e}")
+        compiled, regex_error = compile_pattern_regex(pattern['regex'])
+        if regex_error:
+            errors.append(f"Invalid regex: {regex_error}")
     
     # Validate example if present
     if 'example' in pattern and pattern['example']:
@@ -72,25 +155,259 @@ def validate_pattern_structure(pattern: Dict, key: str) -> List[str]:
         # Check if example matches charset
         if 'charset' in pattern and pattern['charset']:
             charset = pattern['charset']
-            if charset == 'hex' and not re.match(r'^[a-fA-F0-9]+$', example):
+            if charset == 'hex' and not _is_hex(example):
                 errors.append(f"Example doesn't match hex charset: {example}")
-            elif charset == 'base64' and not re.match(r'^[A-Za-z0-9+/]+=*$', example):
+            elif charset == 'base64' and not _is_base64(example):
                 errors.append(f"Example doesn't match base64 charset: {example}")
-            elif charset == 'ascii' and not re.match(r'^[\x20-\x7E]+$', example):
+            elif charset == 'ascii' and not _is_ascii(example):
                 errors.append(f"Example doesn't match ascii charset: {example}")
         
-        # Check if example matches regex
-        if 'regex' in pattern and pattern['regex']:
-            try:
-                if not re.match(pattern['regex'], example):
-                    errors.append(f"Example doesn't match regex: {example}")
-            except re.error:
-                pass  # Already caught above
+        # Check if example matches regex (invalid regexes were reported above)
+        compiled = compile_pattern_regex(pattern['regex'])[0] if pattern.get('regex') else None
+        if compiled and not compiled.match(example):
+            errors.append(f"Example doesn't match regex: {example}")
     
     return errors
 
-def test_pattern_detection(patterns: Dict) -> Dict[str, List[str]]:
-    """Test pattern detection with known hash examples."""
+def _regex_literal(regex: str) -> Optional[str]:
+    """Return the literal text of an escaped '^literal$' regex, or None."""
+    if len(regex) < 2 or regex[0] != '^' or regex[-1] != '$':
+        return None
+    body = regex[1:-1]
+    literal = re.sub(r'\\(.)', r'\1', body, flags=re.DOTALL)
+    return literal if re.escape(literal) == body else None
+
+# Maps the '0'/'1' digits of bin() to 0/1 bytes for itertools.compress
+_BIT_FLAGS = bytes.maketrans(b'01', b'\x00\x01')
+
+# Catalog size from which structure validation uses a process pool
+_PARALLEL_VALIDATION_THRESHOLD = 5000
+
+# Regexes whose anchored literal prefix is at least this long get bucketed
+_MIN_REGEX_PREFIX = 3
+
+def _regex_literal_prefix(regex: str) -> str:
+    """Return the fixed text every match of a '^'-anchored regex starts with."""
+    if not regex.startswith('^') or '|' in regex:
+        return ''
+    prefix = []
+    i = 1
+    while i < len(regex):
+        char = regex[i]
+        if char == '\\' and i + 1 < len(regex) and not regex[i + 1].isalnum():
+            char = regex[i + 1]
+            step = 2
+        elif char in '\\.^$*+?{}[]()|':
+            break
+        else:
+            step = 1
+        # A quantifier applies to the character just read, so it is not fixed
+        if regex[i + step:i + step + 1] in ('*', '+', '?', '{'):
+            break
+        prefix.append(char)
+        i += step
+    return ''.join(prefix)
+
+def _validate_item(item: Tuple[str, Dict]) -> Tuple[str, List[str]]:
+    """Validate one (key, pattern) pair; module-level so worker processes can pickle it."""
+    key, pattern = item
+    return key, validate_pattern_structure(pattern, key)
+
+def validate_all_patterns(patterns: Dict) -> List[Tuple[str, List[str]]]:
+    """Validate every pattern, returning (key, errors) for those with errors.
+    
+    Large catalogs are spread over a process pool; below the threshold the
+    pool's startup cost outweighs the gain, so validation runs serially.
+    """
+    if len(patterns) >= _PARALLEL_VALIDATION_THRESHOLD:
+        with ProcessPoolExecutor() as executor:
+            results = executor.map(_validate_item, patterns.items(), chunksize=64)
+            return [(key, errors) for key, errors in results if errors]
+    
+    return [(key, errors) for key, errors in map(_validate_item, patterns.items()) if errors]
+
+def _build_prefix_trie(prefix_masks: Dict[str, int]) -> List:
+    """Build a character trie of [mask, children] nodes from prefix -> mask."""
+    root = [0, {}]
+    for prefix, mask in prefix_masks.items():
+        node = root
+        for char in prefix:
+            node = node[1].setdefault(char, [0, {}])
+        node[0] |= mask
+    return root
+
+# Flags re.compile gives a str pattern without inline flags
+_DEFAULT_REGEX_FLAGS = re.compile('').flags
+
+def build_detection_index(patterns: Dict) -> Dict:
+    """Index patterns by length, prefix and charset so detection avoids scanning every pattern.
+    
+    Every index entry holds a bitmask over pattern positions rather than a key
+    list, so detection only ORs integers and decodes the mask once at the end.
+    """
+    by_length = defaultdict(int)
+    by_prefix = defaultdict(int)
+    by_charset = defaultdict(int)
+    by_regex = defaultdict(int)
+    
+    for i, pattern in enumerate(patterns.values()):
+        bit = 1 << i
+        if pattern.get('length'):
+            by_length[pattern['length']] |= bit
+        
+        if pattern.get('prefixes'):
+            for prefix in pattern['prefixes']:
+                by_prefix[prefix] |= bit
+        
+        if pattern.get('regex') and compile_pattern_regex(pattern['regex'])[0]:
+            by_regex[pattern['regex']] |= bit
+        
+        if pattern.get('charset') in _CHARSET_CHECKS:
+            by_charset[pattern['charset']] |= bit
+    
+    # Split regexes into exact literals, a combined alternation and leftovers
+    literals = defaultdict(int)
+    pending = []
+    for regex, mask in by_regex.items():
+        literal = _regex_literal(regex)
+        if literal is not None:
+            literals[literal] |= mask
+        else:
+            pending.append((regex, compile_pattern_regex(regex)[0], mask))
+    
+    # Regexes with a usable literal prefix only run when the hash starts with it
+    prefixed = defaultdict(list)
+    residual = []
+    for regex, compiled, mask in pending:
+        prefix = _regex_literal_prefix(regex)
+        if len(prefix) >= _MIN_REGEX_PREFIX:
+            prefixed[prefix].append((compiled.match, mask))
+        else:
+            residual.append((regex, compiled, mask))
+    
+    # Inline global flags such as (?i) would apply to the whole alternation
+    # (Python 3.10 only warns about them mid-pattern), so those regexes and
+    # ones with their own groups are matched on their own
+    branches = []
+    regexes = []
+    for regex, compiled, mask in residual:
+        branch = f'(?P<_r{len(branches)}>{regex})'
+        mergeable = compiled.groups == 0 and compiled.flags == _DEFAULT_REGEX_FLAGS
+        if mergeable:
+            try:
+                mergeable = re.compile(branch).groups == 1
+            except re.error:
+                mergeable = False
+        if mergeable:
+            branches.append((branch, compiled, mask))
+        else:
+            regexes.append((compiled.match, mask))
+    
+    return {
+        'keys': list(patterns),
+        'length': dict(by_length),
+        'prefix_trie': _build_prefix_trie(by_prefix),
+        'charset': dict(by_charset),
+        'literal': dict(literals),
+        'regex_prefix': dict(prefixed),
+        'regex_prefix_lengths': sorted({len(prefix) for prefix in prefixed}),
+        'regex_prefix_tuple': tuple(prefixed),
+        'regex_set': re.compile('|'.join(b[0] for b in branches)).match if branches else None,
+        'regex_branches': [(compiled.match, mask) for _, compiled, mask in branches],
+        'regex': regexes,
+    }
+
+def detect_patterns(hash_input: str, index: Dict) -> List[str]:
+    """Return the keys of all patterns matching hash_input, in pattern order."""
+    input_length = len(hash_input)
+    detected = index['length'].get(input_length, 0)
+    
+    # Check prefix match by walking the trie until the hash leaves it
+    mask, children = index['prefix_trie']
+    detected |= mask
+    for char in hash_input:
+        node = children.get(char)
+        if node is None:
+            break
+        mask, children = node
+        detected |= mask
+    
+    # Check regex match: '^literal$' also matches before a trailing newline
+    literals = index['literal']
+    detected |= literals.get(hash_input, 0)
+    if hash_input.endswith('\n'):
+        detected |= literals.get(hash_input[:-1], 0)
+    
+    if hash_input.startswith(index['regex_prefix_tuple']):
+        regex_buckets = index['regex_prefix']
+        for size in index['regex_prefix_lengths']:
+            if size > input_length:
+                break
+            for match_regex, mask in regex_buckets.get(hash_input[:size], ()):
+                if match_regex(hash_input):
+                    detected |= mask
+    
+    # One pass over the combined alternation finds the first matching branch;
+    # only the branches after it still need to be tried individually
+    if index['regex_set']:
+        match = index['regex_set'](hash_input)
+        if match:
+            first = int(match.lastgroup[2:])
+            branches = index['regex_branches']
+            detected |= branches[first][1]
+            for match_regex, mask in branches[first + 1:]:
+                if match_regex(hash_input):
+                    detected |= mask
+    
+    for match_regex, mask in index['regex']:
+        if match_regex(hash_input):
+            detected |= mask
+    
+    # Check charset match
+    charset_map = index['charset']
+    for charset in _matching_charsets(hash_input):
+        detected |= charset_map.get(charset, 0)
+    
+    # Bit i of the mask is character i of the reversed binary string
+    flags = bin(detected)[:1:-1].encode('ascii').translate(_BIT_FLAGS)
+    return list(compress(index['keys'], flags))
+
+@dataclass(slots=True, frozen=True)
+class _PatternRecord:
+    """Detection fields of one pattern, flattened out of its dict."""
+    length: Optional[int]
+    prefixes: Tuple[str, ...]
+    match: Optional[Callable]
+    charset: Optional[str]
+    
+    @classmethod
+    def from_pattern(cls, pattern: Dict) -> '_PatternRecord':
+        compiled = compile_pattern_regex(pattern['regex'])[0] if pattern.get('regex') else None
+        return cls(
+            length=pattern.get('length'),
+            prefixes=tuple(pattern.get('prefixes') or ()),
+            match=compiled.match if compiled else None,
+            charset=pattern.get('charset'),
+        )
+    
+    def matches(self, hash_input: str) -> bool:
+        """Check hash_input against this pattern with the same rules as detect_patterns."""
+        if self.length and len(hash_input) == self.length:
+            return True
+        if self.prefixes and hash_input.startswith(self.prefixes):
+            return True
+        if self.match and self.match(hash_input):
+            return True
+        return self.charset in _matching_charsets(hash_input)
+
+def test_pattern_detection(patterns: Dict, index: Optional[Dict] = None,
+                           verify_only: bool = False) -> Dict[str, List[str]]:
+    """Test pattern detection with known hash examples.
+    
+    Pass the result of build_detection_index to reuse an index built at load time.
+    With verify_only, only the expected patterns are checked and 'detected' lists
+    just those of them that match, which is enough to decide 'correct'.
+    """
     
     # Test cases: (hash, expected_patterns)
     test_cases = [
@@ -119,42 +436,19 @@ def test_pattern_detection(patterns: Dict) -> Dict[str, List[str]]:
         ("$6$rounds=5000$salt$hash", ["SHA-512_crypt"]),
     ]
     
+    if verify_only:
+        expected_keys = {key for _, expected in test_cases for key in expected if key in patterns}
+        records = {key: _PatternRecord.from_pattern(patterns[key]) for key in expected_keys}
+    elif index is None:
+        index = build_detection_index(patterns)
     results = {}
     
     for hash_input, expected_patterns in test_cases:
-        detected_patterns = []
-        
-        for key, pattern in patterns.items():
-            # Check length match
-            if pattern.get('length') and len(hash_input) == pattern['length']:
-                detected_patterns.append(key)
-                continue
-            
-            # Check prefix match
-            if pattern.get('prefixes'):
-                for prefix in pattern['prefixes']:
-                    if hash_input.startswith(prefix):
-                        detected_patterns.append(key)
-                        break
-            
-            # Check regex match
-            if pattern.get('regex'):
-                try:
-                    if re.match(pattern['regex'], hash_input):
-                        detected_patterns.append(key)
-                        continue
-                except re.error:
-                    pass
-            
-            # Check charset match
-            if pattern.get('charset'):
-                charset = pattern['charset']
-                if charset == 'hex' and re.match(r'^[a-fA-F0-9]+$', hash_input):
-                    detected_patterns.append(key)
-                elif charset == 'base64' and re.match(r'^[A-Za-z0-9+/]+=*$', hash_input):
-                    detected_patterns.append(key)
-                elif charset == 'ascii' and re.match(r'^[\x20-\x7E]+$', hash_input):
-                    detected_patterns.append(key)
+        if verify_only:
+            detected_patterns = [key for key in expected_patterns
+                                 if key in records and records[key].matches(hash_input)]
+        else:
+            detected_patterns = detect_patterns(hash_input, index)
         
         results[hash_input] = {
             'detected': detected_patterns,
@@ -164,51 +458,62 @@ def test_pattern_detection(patterns: Dict) -> Dict[str, List[str]]:
     
     return results
 
-def generate_pattern_report(patterns: Dict) -> str:
-    """Generate a comprehensive report about the patterns."""
+def generate_pattern_report(patterns: Dict, out: Optional[TextIO] = None) -> Optional[str]:
+    """Generate a comprehensive report about the patterns.
     
-    report = []
-    report.append("=== HASH PATTERN VALIDATION REPORT ===\n")
+    The report is written to out when given; otherwise it is returned as a string.
+    """
     
-    # Basic statistics
+    # Gather all statistics in a single pass over the patterns
     total_patterns = len(patterns)
-    patterns_with_regex = sum(1 for p in patterns.values() if p.get('regex'))
-    patterns_with_prefixes = sum(1 for p in patterns.values() if p.get('prefixes'))
-    patterns_with_examples = sum(1 for p in patterns.values() if p.get('example'))
-    
-    report.append(f"Total patterns: {total_patterns}")
-    report.append(f"Patterns with regex: {patterns_with_regex} ({patterns_with_regex/total_patterns*100:.1f}%)")
-    report.append(f"Patterns with prefixes: {patterns_with_prefixes} ({patterns_with_prefixes/total_patterns*100:.1f}%)")
-    report.append(f"Patterns with examples: {patterns_with_examples} ({patterns_with_examples/total_patterns*100:.1f}%)")
-    report.append("")
+    patterns_with_regex = 0
+    patterns_with_prefixes = 0
+    patterns_with_examples = 0
+    charset_counts = Counter()
+    length_counts = Counter()
     
-    # Charset distribution
-    charset_counts = {}
     for pattern in patterns.values():
-        charset = pattern.get('charset', 'unknown')
-        charset_counts[charset] = charset_counts.get(charset, 0) + 1
+        if pattern.get('regex'):
+            patterns_with_regex += 1
+        if pattern.get('prefixes'):
+            patterns_with_prefixes += 1
+        if pattern.get('example'):
+            patterns_with_examples += 1
+        
+        charset_counts[pattern.get('charset', 'unknown')] += 1
+        
+        length = pattern.get('length')
+        if length:
+            length_counts[length] += 1
     
-    report.append("Charset distribution:")
+    report = out if out is not None else io.StringIO()
+    report.write("=== HASH PATTERN VALIDATION REPORT ===\n\n")
+    report.write(f"Total patterns: {total_patterns}\n")
+    report.write(f"Patterns with regex: {patterns_with_regex} ({patterns_with_regex/total_patterns*100:.1f}%)\n")
+    report.write(f"Patterns with prefixes: {patterns_with_prefixes} ({patterns_with_prefixes/total_patterns*100:.1f}%)\n")
+    report.write(f"Patterns with examples: {patterns_with_examples} ({patterns_with_examples/total_patterns*100:.1f}%)\n\n")
+    
+    # Charset distribution
+    report.write("Charset distribution:\n")
     for charset, count in sorted(charset_counts.items()):
-        report.append(f"  {charset}: {count} ({count/total_patterns*100:.1f}%)")
-    report.append("")
+        report.write(f"  {charset}: {count} ({count/total_patterns*100:.1f}%)\n")
     
     # Length distribution
-    length_counts = {}
-    for pattern in patterns.values():
-        length = pattern.get('length')
-        if length:
-            length_counts[length] = length_counts.get(length, 0) + 1
-    
-    report.append("Length distribution (top 10):")
-    for length, count in sorted(length_counts.items(), key=lambda x: x[1], reverse=True)[:10]:
-        report.append(f"  {length} chars: {count} patterns")
-    report.append("")
+    report.write("\nLength distribution (top 10):\n")
+    for length, count in length_counts.most_common(10):
+        report.write(f"  {length} chars: {count} patterns\n")
     
-    return "\n".join(report)
+    if out is None:
+        return report.getvalue()
 
 def main():
     """Main function to validate and test patterns."""
+    parser = argparse.ArgumentParser(description="Validate hash patterns and test detection accuracy.")
+    parser.add_argument('--verify', action='store_true',
+                        help="only check each test hash against its expected patterns, "
+                             "skipping the full detection index")
+    args = parser.parse_args()
+    
     patterns_file = "backend/data/hash_patterns.json"
     
     print("Loading patterns...")
@@ -219,15 +524,11 @@ def main():
         return
     
     print(f"Loaded {len(patterns)} patterns")
+    index = None if args.verify else build_detection_index(patterns)
     
     # Validate pattern structure
     print("\nValidating pattern structure...")
-    validation_errors = []
-    
-    for key, pattern in patterns.items():
-        errors = validate_pattern_structure(pattern, key)
-        if errors:
-            validation_errors.append((key, errors))
+    validation_errors = validate_all_patterns(patterns)
     
     if validation_errors:
         print(f"Found {len(validation_errors)} patterns with errors:")
@@ -240,7 +541,7 @@ def main():
     
     # Test pattern detection
     print("\nTesting pattern detection...")
-    test_results = test_pattern_detection(patterns)
+    test_results = test_pattern_detection(patterns, index, verify_only=args.verify)
     
     correct_detections = sum(1 for r in test_results.values() if r['correct'])
     total_tests = len(test_results)
@@ -256,12 +557,9 @@ def main():
     
     # Generate report
     print("\nGenerating pattern report...")
-    report = generate_pattern_report(patterns)
-    
-    # Save report
     report_file = "pattern_validation_report.txt"
     with open(report_file, 'w', encoding='utf-8') as f:
-        f.write(report)
+        generate_pattern_report(patterns, f)
     
     print(f"Report saved to {report_file}")
     print("\nPattern validation completed!")
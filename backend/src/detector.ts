@@ -53,15 +53,35 @@ interface AnalysisResult {
 
 let hashPatterns: { [key: string]: HashPattern } = {};
 
+// Pattern regexes compiled once at load, keyed by source so patterns sharing
+// a regex share one RegExp. Invalid regexes map to null.
+let compiledRegexes: Map<string, RegExp | null> = new Map();
+
+function compilePatternRegexes(patterns: { [key: string]: HashPattern }): Map<string, RegExp | null> {
+  const compiled = new Map<string, RegExp | null>();
+  for (const pattern of Object.values(patterns)) {
+    if (pattern.regex && !compiled.has(pattern.regex)) {
+      try {
+        compiled.set(pattern.regex, new RegExp(pattern.regex));
+      } catch (e) {
+        compiled.set(pattern.regex, null);
+      }
+    }
+  }
+  return compiled;
+}
+
 export async function loadHashPatterns(): Promise<void> {
   try {
     const patternsPath = path.join(__dirname, '../data/hash_patterns.json');
     const data = await fs.readJson(patternsPath);
     hashPatterns = data;
-    console.log(`Loaded ${Object.keys(hashPatterns).length} hash patterns`);
+    compiledRegexes = compilePatternRegexes(hashPatterns);
+    console.log(`Loaded ${Object.keys(hashPatterns).length} hash patterns (${compiledRegexes.size} unique regexes)`);
   } catch (error) {
     console.error('Failed to load hash patterns:', error);
     hashPatterns = {};
+    compiledRegexes = new Map();
   }
 }
 
@@ -92,15 +112,12 @@ export function detectCandidates(input: string): DetectionResult[] {
     
     // 1. Regex matching (highest priority - weight: 0.4)
     if (pattern.regex) {
-      try {
-        const regex = new RegExp(pattern.regex);
-        if (regex.test(input)) {
-          score += 0.4;
-          reasons.push('Regex pattern match');
-          hasRegexMatch = true;
-        }
-      } catch (e) {
-        // Invalid regex, skip
+      // Invalid regexes were compiled to null at load, skip them
+      const regex = compiledRegexes.get(pattern.regex);
+      if (regex && regex.test(input)) {
+        score += 0.4;
+        reasons.push('Regex pattern match');
+        hasRegexMatch = true;
       }
     }
     